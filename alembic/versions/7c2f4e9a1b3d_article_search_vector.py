@@ -0,0 +1,51 @@
+"""article_search_vector
+
+Revision ID: 7c2f4e9a1b3d
+Revises: 48306723aa33
+Create Date: 2026-10-18 10:12:41.218734
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c2f4e9a1b3d"
+down_revision: Union[str, None] = "48306723aa33"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "articles",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('portuguese', title), 'A') || "
+                "setweight(to_tsvector('portuguese', "
+                "regexp_replace(content, '<[^>]*>', ' ', 'g')), 'B')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_articles_search_vector",
+        "articles",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_articles_search_vector", table_name="articles", postgresql_using="gin"
+    )
+    op.drop_column("articles", "search_vector")
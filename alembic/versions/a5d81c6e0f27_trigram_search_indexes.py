@@ -0,0 +1,53 @@
+"""trigram_search_indexes
+
+Revision ID: a5d81c6e0f27
+Revises: 7c2f4e9a1b3d
+Create Date: 2026-10-18 11:03:17.552190
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a5d81c6e0f27"
+down_revision: Union[str, None] = "7c2f4e9a1b3d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_articles_title_trgm",
+        "articles",
+        ["title"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_users_full_name_trgm",
+        "users",
+        ["full_name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"full_name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_users_email_trgm",
+        "users",
+        ["email"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"email": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_email_trgm", table_name="users")
+    op.drop_index("ix_users_full_name_trgm", table_name="users")
+    op.drop_index("ix_articles_title_trgm", table_name="articles")
+    op.execute("DROP EXTENSION IF EXISTS pg_trgm")
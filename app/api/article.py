@@ -31,34 +31,45 @@ async def search_articles(
     search_type: ArticleSearch | None = None,
     search: str | None = None,
     section: SectionName | None = None,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
 ):
-    if search_type == ArticleSearch.AUTHOR:
-        total_articles = article_crud.get_articles_by_author_name_search(
-            db=db, author=search, section=section
-        )
-        articles = article_crud.get_articles_by_author_name_search(
-            db=db, author=search, section=section, skip=skip, limit=limit
-        )
-    elif search_type == ArticleSearch.CONTENT:
-        total_articles = article_crud.get_articles_by_content(
-            db=db, content=search, section=section
-        )
-        articles = article_crud.get_articles_by_content(
-            db=db, content=search, section=section, skip=skip, limit=limit
-        )
-    else:
-        total_articles = article_crud.get_articles_by_section(db=db, section=section)
-        articles = article_crud.get_articles_by_section(
-            db=db, section=section, skip=skip, limit=limit
-        )
+    try:
+        if search_type == ArticleSearch.AUTHOR:
+            articles, total, next_cursor = (
+                article_crud.get_articles_by_author_name_search(
+                    db=db,
+                    author=search,
+                    section=section,
+                    skip=skip,
+                    limit=limit,
+                    cursor=cursor,
+                )
+            )
+        elif search_type == ArticleSearch.CONTENT:
+            articles, total, next_cursor = article_crud.get_articles_by_content(
+                db=db,
+                content=search,
+                section=section,
+                skip=skip,
+                limit=limit,
+                cursor=cursor,
+            )
+        else:
+            articles, total, next_cursor = article_crud.get_articles_by_section(
+                db=db, section=section, skip=skip, limit=limit, cursor=cursor
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     public_articles = []
 
     for article in articles:
         public_articles.append(ArticlePublic(**article.__dict__))
 
-    return ArticleSearchResponse(articles=public_articles, total=len(total_articles))
+    return ArticleSearchResponse(
+        articles=public_articles, total=total, next_cursor=next_cursor
+    )
 
 
 @app.get("/{article_id}", response_model=ArticleMain)
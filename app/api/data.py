@@ -1,95 +1,355 @@
+import asyncio
+import hashlib
+import json
+import re
 from datetime import datetime
-from typing import List, Dict
-from pathlib import Path
-import csv
-import requests
+from typing import Annotated, Dict, Iterator, List
 
-from fastapi import APIRouter, HTTPException
+import numpy as np
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import StreamingResponse
 
-from app.schemas.data import CensitaryValue
+import app.core.config as cfg
+from app.core.auth import get_current_admin
+from app.core.notifications import (
+    NotificationCube,
+    get_notification_cube,
+    publish_month_file,
+)
+from app.core.sisa_web import get_sisa_web_properties
+from app.models import User
+from app.schemas.data import (
+    CensitarySeries,
+    CensitaryValue,
+    CombinedData,
+    ControlChannelValue,
+    Granularity,
+    Hotspot,
+    HotspotMetric,
+    MonthUpload,
+    NotificationSeries,
+    OutputFormat,
+)
 
 app = APIRouter()
 
-BASE_CSV_DIR = Path("data/notification_count")
-sisa_web_api_url = "https://vigent.saude.sp.gov.br/sisaweb_api/dados.php"
+NDJSON_CHUNK_ROWS = 1000
 
 
-@app.get("/sjrp_notifications", response_model=List[CensitaryValue])
-async def get_sjrp_notifications(start_date: datetime, end_date: datetime):
+def notification_cache_headers(
+    request: Request,
+    response: Response,
+    cube: NotificationCube = Depends(get_notification_cube),
+) -> Dict[str, str]:
+    # The same data and query always give the same body, so the ETag is
+    # derived from both instead of hashing the response
+    query = sorted(request.query_params.multi_items())
+    digest = hashlib.sha256(
+        f"{cube.version}:{request.url.path}:{query}".encode()
+    ).hexdigest()
+    headers = {
+        "ETag": f'"{digest}"',
+        "Cache-Control": f"public, max-age={cfg.NOTIFICATION_CACHE_MAX_AGE_SECONDS}",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and (
+        if_none_match.strip() == "*"
+        or headers["ETag"]
+        in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    ):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return headers
+
+
+@app.get(
+    "/sjrp_notifications",
+    response_model=List[CensitaryValue],
+    response_model_exclude_none=True,
+)
+async def get_sjrp_notifications(
+    start_date: datetime,
+    end_date: datetime,
+    granularity: Granularity = Granularity.TRACT,
+    codes: List[str] | None = Query(None),
+    code_prefix: str | None = None,
+    output_format: OutputFormat = OutputFormat.JSON,
+    cube: NotificationCube = Depends(get_notification_cube),
+    cache_headers: Dict[str, str] = Depends(notification_cache_headers),
+):
     if start_date > end_date:
         raise HTTPException(
             status_code=400, detail="The start date must be before the end date."
         )
 
-    aggregated_data: Dict[str, int] = {}
-
-    current_date = start_date
-    while current_date <= end_date:
-        file_date = current_date.strftime("%Y%m")
-        file_path = BASE_CSV_DIR / f"{file_date}.csv"
-
-        if not file_path.exists():
-            current_date = increment_month(current_date)
-            continue
-
-        try:
-            with file_path.open("r", encoding="utf-8") as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    censitary_code = row.get("censitario")
-                    value = int(row.get("notificacoes", 0))
-
-                    if censitary_code in aggregated_data:
-                        aggregated_data[censitary_code] += value
-                    else:
-                        aggregated_data[censitary_code] = value
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error processing file {file_path.name}: {str(e)}",
-            )
+    codes, blocks, values = cube.aggregate(
+        start_date, end_date, granularity, codes, code_prefix
+    )
 
-        current_date = increment_month(current_date)
+    if output_format == OutputFormat.NDJSON:
+        return StreamingResponse(
+            ndjson_rows(codes, blocks, values),
+            media_type="application/x-ndjson",
+            headers=cache_headers,
+        )
 
-    result = [
-        CensitaryValue(censitary_code=key, value=value)
-        for key, value in aggregated_data.items()
-    ]
+    if blocks is None:
+        result = [
+            CensitaryValue(censitary_code=code, value=value)
+            for code, value in zip(codes.tolist(), values.tolist())
+        ]
+    else:
+        result = [
+            CensitaryValue(censitary_code=code, block=block, value=value)
+            for code, block, value in zip(
+                codes.tolist(), blocks.tolist(), values.tolist()
+            )
+        ]
 
     return result
 
 
-@app.get("/sisa_web_properties", response_model=List[CensitaryValue])
-async def get_sisa_web_data(start_date: datetime, end_date: datetime):
-    inicio = start_date.strftime("%Y-%m-%d")
-    final = end_date.strftime("%Y-%m-%d")
+def ndjson_rows(
+    codes: np.ndarray, blocks: np.ndarray | None, values: np.ndarray
+) -> Iterator[str]:
+    # Rows are written straight from the arrays, a chunk at a time, so neither
+    # Pydantic objects nor the whole body are ever held in memory
+    for start in range(0, len(codes), NDJSON_CHUNK_ROWS):
+        chunk = slice(start, start + NDJSON_CHUNK_ROWS)
+        if blocks is None:
+            rows = (
+                {"censitary_code": code, "value": value}
+                for code, value in zip(codes[chunk].tolist(), values[chunk].tolist())
+            )
+        else:
+            rows = (
+                {"censitary_code": code, "value": value, "block": block}
+                for code, block, value in zip(
+                    codes[chunk].tolist(),
+                    blocks[chunk].tolist(),
+                    values[chunk].tolist(),
+                )
+            )
+        yield "".join(json.dumps(row) + "\n" for row in rows)
+
+
+@app.post("/sjrp_notifications/{month}", response_model=MonthUpload)
+async def upload_sjrp_notifications(
+    month: str,
+    _: Annotated[User, Depends(get_current_admin)],
+    file: UploadFile = File(),
+):
+    if not re.fullmatch(r"\d{4}(0[1-9]|1[0-2])", month):
+        raise HTTPException(
+            status_code=400, detail="The month must be in the YYYYMM format."
+        )
+
+    try:
+        month_data = await asyncio.to_thread(publish_month_file, int(month), file.file)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
 
-    response = requests.get(
-        url=f"{sisa_web_api_url}?tipo=4&id=471&exec=2&censitario=1&inicio={inicio}&final={final}"
+    return MonthUpload(
+        month=month,
+        censitary_codes=len({code for code, _ in month_data}),
+        notifications=sum(month_data.values()),
     )
 
-    if response.status_code == 200:
-        data = response.json()
-    else:
+
+@app.get(
+    "/sjrp_notifications/series",
+    response_model=NotificationSeries,
+    response_model_exclude_none=True,
+    dependencies=[Depends(notification_cache_headers)],
+)
+async def get_sjrp_notification_series(
+    start_date: datetime,
+    end_date: datetime,
+    granularity: Granularity = Granularity.TRACT,
+    codes: List[str] | None = Query(None),
+    code_prefix: str | None = None,
+    cube: NotificationCube = Depends(get_notification_cube),
+):
+    if start_date > end_date:
         raise HTTPException(
-            status_code=500,
-            detail=f"Error fetching data from SISA Web API: {response.text}",
+            status_code=400, detail="The start date must be before the end date."
         )
 
-    censitary_values = []
+    months, series_codes, blocks, values = cube.series(
+        start_date, end_date, granularity, codes, code_prefix
+    )
+
+    if blocks is None:
+        blocks = [None] * len(series_codes)
+    else:
+        blocks = blocks.tolist()
 
-    for data_piece in data:
-        censitary_code = data_piece["censitario"] + "P"
-        censitary_values.append(
-            CensitaryValue(
-                censitary_code=censitary_code, value=data_piece["trabalhados"]
+    return NotificationSeries(
+        months=[f"{month // 100}-{month % 100:02d}" for month in months.tolist()],
+        series=[
+            CensitarySeries(censitary_code=code, block=block, values=code_values)
+            for code, block, code_values in zip(
+                series_codes.tolist(), blocks, values.tolist()
             )
+        ],
+    )
+
+
+@app.get(
+    "/sjrp_notifications/hotspots",
+    response_model=List[Hotspot],
+    response_model_exclude_none=True,
+    dependencies=[Depends(notification_cache_headers)],
+)
+async def get_sjrp_notification_hotspots(
+    start_date: datetime,
+    end_date: datetime,
+    k: int = Query(10, ge=1),
+    granularity: Granularity = Granularity.TRACT,
+    metric: HotspotMetric = HotspotMetric.COUNT,
+    cube: NotificationCube = Depends(get_notification_cube),
+):
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=400, detail="The start date must be before the end date."
+        )
+
+    try:
+        codes, blocks, values, scores = cube.hotspots(
+            start_date, end_date, k, granularity, metric
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
+
+    if blocks is None:
+        blocks = [None] * len(codes)
+    else:
+        blocks = blocks.tolist()
+
+    return [
+        Hotspot(censitary_code=code, block=block, value=value, score=score)
+        for code, block, value, score in zip(
+            codes.tolist(), blocks, values.tolist(), scores.tolist()
+        )
+    ]
+
+
+@app.get(
+    "/sjrp_notifications/control_channel",
+    response_model=List[ControlChannelValue],
+    response_model_exclude_none=True,
+    dependencies=[Depends(notification_cache_headers)],
+)
+async def get_sjrp_notification_control_channel(
+    start_date: datetime,
+    end_date: datetime,
+    granularity: Granularity = Granularity.TRACT,
+    cube: NotificationCube = Depends(get_notification_cube),
+):
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=400, detail="The start date must be before the end date."
+        )
+
+    try:
+        codes, blocks, values, bands = cube.control_channel(
+            start_date, end_date, granularity
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
+
+    if blocks is None:
+        blocks = [None] * len(codes)
+    else:
+        blocks = blocks.tolist()
+
+    first_quartiles, medians, third_quartiles = bands.tolist()
+
+    return [
+        ControlChannelValue(
+            censitary_code=code,
+            block=block,
+            value=value,
+            first_quartile=first_quartile,
+            median=median,
+            third_quartile=third_quartile,
+            above=value > third_quartile,
         )
+        for code, block, value, first_quartile, median, third_quartile in zip(
+            codes.tolist(),
+            blocks,
+            values.tolist(),
+            first_quartiles,
+            medians,
+            third_quartiles,
+        )
+    ]
+
+
+@app.get(
+    "/sisa_web_properties",
+    response_model=List[CensitaryValue],
+    response_model_exclude_none=True,
+)
+async def get_sisa_web_data(start_date: datetime, end_date: datetime):
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=400, detail="The start date must be before the end date."
+        )
+
+    properties = await get_sisa_web_properties(start_date.date(), end_date.date())
+
+    censitary_values = [
+        CensitaryValue(censitary_code=censitary_code + "P", value=value)
+        for censitary_code, value in properties.items()
+    ]
 
     return censitary_values
 
 
-def increment_month(date: datetime) -> datetime:
-    year = date.year + (date.month // 12)
-    month = date.month % 12 + 1
-    return date.replace(year=year, month=month, day=1)
+@app.get("/combined", response_model=CombinedData)
+async def get_combined_data(
+    start_date: datetime,
+    end_date: datetime,
+    cube: NotificationCube = Depends(get_notification_cube),
+):
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=400, detail="The start date must be before the end date."
+        )
+
+    (codes, _, values), properties = await asyncio.gather(
+        asyncio.to_thread(cube.aggregate, start_date, end_date),
+        get_sisa_web_properties(start_date.date(), end_date.date()),
+    )
+
+    # Both sources share one row per censitary code
+    rows: Dict[str, List[int]] = {
+        code: [value, 0] for code, value in zip(codes.tolist(), values.tolist())
+    }
+    for censitary_code, value in properties.items():
+        rows.setdefault(censitary_code + "P", [0, 0])[1] = value
+
+    return CombinedData(
+        censitary_codes=list(rows),
+        notifications=[row[0] for row in rows.values()],
+        properties=[row[1] for row in rows.values()],
+    )
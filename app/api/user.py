@@ -318,14 +318,12 @@ async def get_users(
     search: str | None = None,
     db: Session = Depends(get_db),
 ):
-    total_users = user_crud.list_users(db=db, role=filter_by_role, search=search)
-
-    users = user_crud.list_users(
+    users, total = user_crud.list_users(
         db=db, skip=skip, limit=limit, role=filter_by_role, search=search
     )
 
     return UserADMViewWithPagination(
-        users=[UserADMView(**user.__dict__) for user in users], total=len(total_users)
+        users=[UserADMView(**user.__dict__) for user in users], total=total
     )
 
 
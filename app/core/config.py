@@ -14,3 +14,20 @@ JWT_KEY = os.getenv("JWT_KEY")
 CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
 CLOUDINARY_API_KEY = os.getenv("CLOUDINARY_API_KEY")
 CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
+NOTIFICATION_REFRESH_SECONDS = float(os.getenv("NOTIFICATION_REFRESH_SECONDS", 300))
+NOTIFICATION_CACHE_MAX_AGE_SECONDS = int(
+    os.getenv("NOTIFICATION_CACHE_MAX_AGE_SECONDS", 300)
+)
+SISA_WEB_API_URL = os.getenv(
+    "SISA_WEB_API_URL", "https://vigent.saude.sp.gov.br/sisaweb_api/dados.php"
+)
+SISA_WEB_TIMEOUT_SECONDS = float(os.getenv("SISA_WEB_TIMEOUT_SECONDS", 15))
+SISA_WEB_POOL_TIMEOUT_SECONDS = float(os.getenv("SISA_WEB_POOL_TIMEOUT_SECONDS", 5))
+SISA_WEB_MAX_CONNECTIONS = int(os.getenv("SISA_WEB_MAX_CONNECTIONS", 10))
+SISA_WEB_CURRENT_MONTH_TTL_SECONDS = float(
+    os.getenv("SISA_WEB_CURRENT_MONTH_TTL_SECONDS", 600)
+)
+SISA_WEB_FAILURE_THRESHOLD = int(os.getenv("SISA_WEB_FAILURE_THRESHOLD", 5))
+SISA_WEB_RECOVERY_SECONDS = float(os.getenv("SISA_WEB_RECOVERY_SECONDS", 30))
+SISA_WEB_BUCKET_CACHE_SIZE = int(os.getenv("SISA_WEB_BUCKET_CACHE_SIZE", 240))
+SISA_WEB_STORE_PATH = os.getenv("SISA_WEB_STORE_PATH", "data/sisa_web.sqlite3")
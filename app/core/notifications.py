@@ -0,0 +1,658 @@
+import asyncio
+import codecs
+import csv
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from app.logger import logger  # noqa: F401
+from app.schemas.data import Granularity, HotspotMetric
+
+BASE_CSV_DIR = Path("data/notification_count")
+ARCHIVE_DIR = Path("data/notification_cube")
+ARCHIVE_ARRAYS = (
+    "months",
+    "codes",
+    "code_ids",
+    "blocks",
+    "cumulative",
+    "fingerprints",
+)
+
+# Length of the IBGE censitary code prefix that identifies each rollup level
+CODE_PREFIX_LENGTHS = {
+    Granularity.SUBDISTRICT: 11,
+    Granularity.DISTRICT: 9,
+    Granularity.MUNICIPALITY: 7,
+}
+
+# Prior years needed before a window can be compared with its history
+MIN_PRIOR_YEARS = 2
+
+CSV_HEADER = ["mes_ano", "notificacoes", "censitario", "quarteirao"]
+CENSITARY_CODE_PATTERN = re.compile(r"\d{15}P")
+
+BlockKey = Tuple[str, str]
+Fingerprint = Tuple[int, int]
+
+
+class CubeLevel:
+    """Prefix-summed counts of one granularity level.
+
+    Column `j` of `cumulative` belongs to `codes[j]` (and `blocks[j]` at
+    block level). Row `i` is the total of the first `i` months, so any
+    month window is the difference of two rows. Columns are sorted by code,
+    so `code_columns` maps each code to the contiguous range of its columns.
+    """
+
+    def __init__(
+        self,
+        codes: np.ndarray,
+        cumulative: np.ndarray,
+        blocks: np.ndarray | None = None,
+    ):
+        self.codes = codes
+        self.cumulative = cumulative
+        self.blocks = blocks
+
+        unique_codes, starts, counts = np.unique(
+            codes, return_index=True, return_counts=True
+        )
+        self.code_columns: Dict[str, Tuple[int, int]] = {
+            code: (start, start + count)
+            for code, start, count in zip(
+                unique_codes.tolist(), starts.tolist(), counts.tolist()
+            )
+        }
+
+    def rollup(self, keys: np.ndarray) -> "CubeLevel":
+        # Columns are sorted by code, so every key is a contiguous run of columns
+        codes, starts = np.unique(keys, return_index=True)
+        if len(starts) == 0:
+            cumulative = np.zeros((len(self.cumulative), 0), dtype=np.int64)
+        else:
+            cumulative = np.add.reduceat(self.cumulative, starts, axis=1)
+        return CubeLevel(codes=codes, cumulative=cumulative)
+
+    def totals(self, months: slice) -> np.ndarray:
+        return self.cumulative[months.stop] - self.cumulative[months.start]
+
+    def columns(
+        self, codes: List[str] | None = None, code_prefix: str | None = None
+    ) -> np.ndarray:
+        start, stop = 0, len(self.codes)
+        if code_prefix is not None:
+            # Codes sharing a prefix are a contiguous run of the sorted codes
+            start = np.searchsorted(self.codes, code_prefix, side="left")
+            stop = np.searchsorted(self.codes, code_prefix + chr(0x10FFFF))
+
+        if codes is None:
+            return np.arange(start, stop)
+
+        ranges = sorted(
+            self.code_columns[code] for code in set(codes) if code in self.code_columns
+        )
+        return np.array(
+            [
+                column
+                for range_start, range_stop in ranges
+                for column in range(max(range_start, start), min(range_stop, stop))
+            ],
+            dtype=np.intp,
+        )
+
+
+class NotificationCube:
+    """Notification counts as a months x blocks matrix with hierarchical rollups.
+
+    `months` holds the sorted YYYYMM of every loaded file, `fingerprints`
+    the (mtime, size) each of them had when read, and `cumulative` the
+    block level prefix sums. The block columns are sorted by (censitary
+    code, block), which keeps every census tract and every code prefix
+    contiguous, so each coarser level is built once with a single
+    `reduceat` over the block columns.
+    """
+
+    def __init__(
+        self,
+        months: np.ndarray,
+        codes: np.ndarray,
+        blocks: np.ndarray,
+        cumulative: np.ndarray,
+        fingerprints: Dict[int, Fingerprint] | None = None,
+    ):
+        self.months = months
+        self.fingerprints = fingerprints or {}
+        # Changes whenever a month is added, replaced or removed. Months merged
+        # from other directories have no fingerprint, the grand total catches those
+        self.version = hashlib.sha256(
+            repr(
+                (
+                    sorted(self.fingerprints.items()),
+                    months.tolist(),
+                    int(cumulative[-1].sum()),
+                )
+            ).encode()
+        ).hexdigest()
+
+        block_level = CubeLevel(codes=codes, cumulative=cumulative, blocks=blocks)
+        self.levels: Dict[Granularity, CubeLevel] = {
+            Granularity.BLOCK: block_level,
+            Granularity.TRACT: block_level.rollup(codes),
+        }
+        tract_level = self.levels[Granularity.TRACT]
+        for granularity, length in CODE_PREFIX_LENGTHS.items():
+            self.levels[granularity] = tract_level.rollup(
+                tract_level.codes.astype(f"<U{length}")
+            )
+
+    def month_range(self, start_date: datetime, end_date: datetime) -> slice:
+        return self.month_key_range(month_key(start_date), month_key(end_date))
+
+    def month_key_range(self, start_month: int, end_month: int) -> slice:
+        start = np.searchsorted(self.months, start_month, side="left")
+        end = np.searchsorted(self.months, end_month, side="right")
+        return slice(start, end)
+
+    def aggregate(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        granularity: Granularity = Granularity.TRACT,
+        codes: List[str] | None = None,
+        code_prefix: str | None = None,
+    ) -> Tuple[np.ndarray, np.ndarray | None, np.ndarray]:
+        level = self.levels[granularity]
+        months = self.month_range(start_date, end_date)
+
+        columns = level.columns(codes, code_prefix)
+        totals = (
+            level.cumulative[months.stop, columns]
+            - level.cumulative[months.start, columns]
+        )
+
+        present = np.flatnonzero(totals)
+        columns = columns[present]
+        blocks = None if level.blocks is None else level.blocks[columns]
+        return level.codes[columns], blocks, totals[present]
+
+    def series(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        granularity: Granularity = Granularity.TRACT,
+        codes: List[str] | None = None,
+        code_prefix: str | None = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray | None, np.ndarray]:
+        level = self.levels[granularity]
+        months = self.month_range(start_date, end_date)
+        columns = level.columns(codes, code_prefix)
+        counts = np.diff(
+            level.cumulative[months.start : months.stop + 1, columns], axis=0
+        )
+
+        # Without explicit codes, only the ones with notifications are listed
+        if codes is None:
+            with_notifications = counts.any(axis=0)
+            columns = columns[with_notifications]
+            counts = counts[:, with_notifications]
+
+        blocks = None if level.blocks is None else level.blocks[columns]
+        return self.months[months], level.codes[columns], blocks, counts.T
+
+    def hotspots(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        k: int,
+        granularity: Granularity = Granularity.TRACT,
+        metric: HotspotMetric = HotspotMetric.COUNT,
+    ) -> Tuple[np.ndarray, np.ndarray | None, np.ndarray, np.ndarray]:
+        level = self.levels[granularity]
+        months = self.month_range(start_date, end_date)
+        totals = level.totals(months)
+
+        if metric == HotspotMetric.COUNT:
+            scores = totals.astype(np.float64)
+        else:
+            scores = self.zscores(level, start_date, end_date, totals)
+
+        # Only codes with notifications and a score in the window are
+        # candidates, and only the k best of them are sorted
+        candidates = np.flatnonzero((totals > 0) & ~np.isnan(scores))
+        k = min(k, len(candidates))
+        if k == 0:
+            top = candidates
+        else:
+            top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            top = top[np.argsort(-scores[top], kind="stable")]
+
+        blocks = None if level.blocks is None else level.blocks[top]
+        return level.codes[top], blocks, totals[top], scores[top]
+
+    def prior_year_totals(
+        self, level: CubeLevel, start_date: datetime, end_date: datetime
+    ) -> np.ndarray:
+        # Totals of the same window in every prior year that has the same
+        # calendar months loaded, one row per year
+        start_month, end_month = month_key(start_date), month_key(end_date)
+        window_months = self.month_key_range(start_month, end_month)
+        window_keys = self.months[window_months]
+
+        calendar_months = (
+            (end_date.year - start_date.year) * 12
+            + end_date.month
+            - start_date.month
+            + 1
+        )
+        if len(window_keys) != calendar_months:
+            raise ValueError("Every month of the window must have data loaded.")
+
+        oldest_year = self.months[0] // 100 if len(self.months) else start_month // 100
+
+        baselines = []
+        for years_back in range(1, start_month // 100 - oldest_year + 1):
+            months = self.month_key_range(
+                start_month - 100 * years_back, end_month - 100 * years_back
+            )
+            if np.array_equal(self.months[months] + 100 * years_back, window_keys):
+                baselines.append(level.totals(months))
+
+        if len(baselines) < MIN_PRIOR_YEARS:
+            raise ValueError(
+                f"At least {MIN_PRIOR_YEARS} prior years with data for these months "
+                f"are needed, found {len(baselines)}."
+            )
+
+        return np.stack(baselines)
+
+    def zscores(
+        self,
+        level: CubeLevel,
+        start_date: datetime,
+        end_date: datetime,
+        totals: np.ndarray,
+    ) -> np.ndarray:
+        baselines = self.prior_year_totals(level, start_date, end_date)
+        deviation = baselines.std(axis=0, ddof=1)
+
+        # Codes whose prior years are all equal have no deviation to be scored
+        # against, so their score is NaN instead of a plain difference
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(
+                deviation > 0, (totals - baselines.mean(axis=0)) / deviation, np.nan
+            )
+
+    def control_channel(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        granularity: Granularity = Granularity.TRACT,
+    ) -> Tuple[np.ndarray, np.ndarray | None, np.ndarray, np.ndarray]:
+        # The band is the quartiles of the window totals of the prior years,
+        # so the year being evaluated never shifts its own band
+        level = self.levels[granularity]
+        totals = level.totals(self.month_range(start_date, end_date))
+        bands = np.percentile(
+            self.prior_year_totals(level, start_date, end_date), [25, 50, 75], axis=0
+        )
+        columns = np.flatnonzero((totals > 0) | bands.any(axis=0))
+
+        blocks = None if level.blocks is None else level.blocks[columns]
+        return level.codes[columns], blocks, totals[columns], bands[:, columns]
+
+
+def month_key(date: datetime) -> int:
+    return date.year * 100 + date.month
+
+
+def file_fingerprint(file_path: Path) -> Fingerprint:
+    stat = file_path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def list_month_files(csv_dir: Path = BASE_CSV_DIR) -> Dict[int, Path]:
+    return {
+        int(file_path.stem): file_path
+        for file_path in sorted(csv_dir.glob("[0-9]" * 6 + ".csv"))
+    }
+
+
+def validate_month_rows(month: int, reader: Iterator[List[str]]) -> Iterator[List[str]]:
+    # csv.Error (e.g. a NUL byte) is raised as ValueError like the other
+    # problems of the file
+    try:
+        header = next(reader, None)
+        if header != CSV_HEADER:
+            raise ValueError(f"The header must be {','.join(CSV_HEADER)}")
+
+        for line_number, row in enumerate(reader, start=2):
+            if len(row) != len(CSV_HEADER):
+                raise ValueError(
+                    f"Line {line_number}: expected {len(CSV_HEADER)} columns, "
+                    f"found {len(row)}"
+                )
+
+            mes_ano, notificacoes, censitario, quarteirao = row
+            if mes_ano != str(month):
+                raise ValueError(f"Line {line_number}: mes_ano must be {month}")
+            if not notificacoes.isdigit():
+                raise ValueError(
+                    f"Line {line_number}: notificacoes must be a non-negative integer"
+                )
+            if not CENSITARY_CODE_PATTERN.fullmatch(censitario):
+                raise ValueError(
+                    f"Line {line_number}: censitario must be a 15 digit code followed by P"
+                )
+            if not quarteirao.isdigit():
+                raise ValueError(f"Line {line_number}: quarteirao must be a number")
+
+            yield row
+    except csv.Error as e:
+        raise ValueError(f"Malformed CSV: {str(e)}")
+
+
+def read_validated_month_file(file_path: Path) -> Dict[BlockKey, int]:
+    month_data: Dict[BlockKey, int] = {}
+
+    # utf-8-sig also reads the files Excel exports with a BOM
+    with file_path.open("r", encoding="utf-8-sig", newline="") as csvfile:
+        try:
+            for _, notificacoes, censitario, quarteirao in validate_month_rows(
+                int(file_path.stem), csv.reader(csvfile)
+            ):
+                key = (censitario, quarteirao)
+                month_data[key] = month_data.get(key, 0) + int(notificacoes)
+        except ValueError as e:
+            raise ValueError(f"{file_path}: {str(e)}")
+
+    return month_data
+
+
+def build_cube(
+    monthly_data: Dict[int, Dict[BlockKey, int]],
+    fingerprints: Dict[int, Fingerprint] | None = None,
+    base: NotificationCube | None = None,
+    removed_months: Iterable[int] = (),
+) -> NotificationCube:
+    # Months already in `base` are carried over from its prefix sums, unless
+    # `monthly_data` brings a new version of them or they are removed
+    removed_months = set(removed_months)
+    base_keys: List[BlockKey] = []
+    base_months = np.empty(0, dtype=np.int32)
+    if base is not None:
+        base_level = base.levels[Granularity.BLOCK]
+        base_keys = list(zip(base_level.codes.tolist(), base_level.blocks.tolist()))
+        kept_months = ~np.isin(base.months, list(removed_months))
+        base_months = base.months[kept_months]
+        fingerprints = {
+            month: fingerprint
+            for month, fingerprint in {
+                **base.fingerprints,
+                **(fingerprints or {}),
+            }.items()
+            if month not in removed_months
+        }
+
+    months = np.union1d(base_months, list(monthly_data)).astype(np.int32)
+    keys = sorted(
+        set(base_keys).union(
+            key for month_data in monthly_data.values() for key in month_data
+        )
+    )
+    key_ids = {key: index for index, key in enumerate(keys)}
+
+    counts = np.zeros((len(months), len(keys)), dtype=np.int64)
+    if base is not None:
+        counts[
+            np.ix_(
+                np.searchsorted(months, base_months),
+                [key_ids[key] for key in base_keys],
+            )
+        ] = np.diff(base_level.cumulative, axis=0)[kept_months]
+
+    for month, month_data in monthly_data.items():
+        month_index = np.searchsorted(months, month)
+        columns = [key_ids[key] for key in month_data]
+        counts[month_index] = 0
+        counts[month_index, columns] = list(month_data.values())
+
+    cumulative = np.zeros((len(months) + 1, len(keys)), dtype=np.int64)
+    np.cumsum(counts, axis=0, out=cumulative[1:])
+
+    return NotificationCube(
+        months=months,
+        codes=np.array([code for code, _ in keys], dtype=str),
+        blocks=np.array([block for _, block in keys], dtype=str),
+        cumulative=cumulative,
+        fingerprints=fingerprints,
+    )
+
+
+def load_notification_cube(csv_dir: Path = BASE_CSV_DIR) -> NotificationCube:
+    monthly_data: Dict[int, Dict[BlockKey, int]] = {}
+    fingerprints: Dict[int, Fingerprint] = {}
+
+    for month, file_path in list_month_files(csv_dir).items():
+        fingerprints[month] = file_fingerprint(file_path)
+        monthly_data[month] = read_validated_month_file(file_path)
+
+    return build_cube(monthly_data, fingerprints)
+
+
+def save_notification_archive(
+    cube: NotificationCube, archive_dir: Path = ARCHIVE_DIR
+) -> None:
+    # The block level codes are dictionary encoded against the tract codes
+    block_level = cube.levels[Granularity.BLOCK]
+    codes = cube.levels[Granularity.TRACT].codes
+    arrays = {
+        "months": cube.months,
+        "codes": codes,
+        "code_ids": np.searchsorted(codes, block_level.codes).astype(np.int32),
+        "blocks": block_level.blocks,
+        "cumulative": block_level.cumulative,
+        "fingerprints": np.array(
+            [(month, *fingerprint) for month, fingerprint in cube.fingerprints.items()],
+            dtype=np.int64,
+        ).reshape(-1, 3),
+    }
+
+    # Write next to the live archive and swap it in, so a worker starting
+    # meanwhile never maps a partially written file set
+    building_dir = archive_dir.with_name(f"{archive_dir.name}.building")
+    replaced_dir = archive_dir.with_name(f"{archive_dir.name}.replaced")
+    shutil.rmtree(building_dir, ignore_errors=True)
+    building_dir.mkdir(parents=True)
+    for name, array in arrays.items():
+        np.save(building_dir / f"{name}.npy", np.ascontiguousarray(array))
+
+    shutil.rmtree(replaced_dir, ignore_errors=True)
+    if archive_dir.exists():
+        archive_dir.rename(replaced_dir)
+    building_dir.rename(archive_dir)
+    shutil.rmtree(replaced_dir, ignore_errors=True)
+
+
+def load_notification_archive(archive_dir: Path = ARCHIVE_DIR) -> NotificationCube:
+    arrays = {
+        name: np.load(archive_dir / f"{name}.npy", mmap_mode="r")
+        for name in ARCHIVE_ARRAYS
+    }
+
+    return NotificationCube(
+        months=np.asarray(arrays["months"]),
+        codes=np.asarray(arrays["codes"])[arrays["code_ids"]],
+        blocks=arrays["blocks"],
+        cumulative=arrays["cumulative"],
+        fingerprints={
+            month: (mtime, size)
+            for month, mtime, size in arrays["fingerprints"].tolist()
+        },
+    )
+
+
+_cube: NotificationCube | None = None
+_refresh_lock = threading.RLock()
+
+# Fingerprints of the files that failed validation, so each bad version of a
+# file is only reported once
+_rejected_files: Dict[int, Fingerprint] = {}
+
+
+def init_notification_cube(
+    csv_dir: Path = BASE_CSV_DIR, archive_dir: Path = ARCHIVE_DIR
+) -> None:
+    global _cube
+
+    if archive_dir.exists():
+        _cube = load_notification_archive(archive_dir)
+        logger.info(
+            f"Loaded {len(_cube.months)} months of notifications from {archive_dir}"
+        )
+    else:
+        _cube = build_cube({})
+
+    refresh_notification_cube(csv_dir)
+
+
+def missing_months(cube: NotificationCube, month_files: Dict[int, Path]) -> List[int]:
+    # Only months read from the watched directory have a fingerprint, months
+    # merged from other directories are kept without a file
+    return sorted(month for month in cube.fingerprints if month not in month_files)
+
+
+def refresh_notification_cube(csv_dir: Path = BASE_CSV_DIR) -> bool:
+    with _refresh_lock:
+        cube = _cube if _cube is not None else build_cube({})
+        month_files = list_month_files(csv_dir)
+
+        monthly_data: Dict[int, Dict[BlockKey, int]] = {}
+        fingerprints: Dict[int, Fingerprint] = {}
+        for month, file_path in month_files.items():
+            try:
+                fingerprint = file_fingerprint(file_path)
+            except OSError:
+                # Removed since it was listed, the next refresh drops it
+                continue
+            if fingerprint in (
+                cube.fingerprints.get(month),
+                _rejected_files.get(month),
+            ):
+                continue
+
+            try:
+                month_data = read_validated_month_file(file_path)
+            except (OSError, ValueError) as e:
+                # A bad file keeps its previous data, if any, and never blocks
+                # the other months
+                _rejected_files[month] = fingerprint
+                logger.error(f"Skipping notification file: {str(e)}")
+                continue
+
+            _rejected_files.pop(month, None)
+            fingerprints[month] = fingerprint
+            monthly_data[month] = month_data
+
+        removed_months = missing_months(cube, month_files)
+
+        if not monthly_data and not removed_months:
+            return False
+
+        ingest_notification_months(monthly_data, fingerprints, removed_months)
+
+    return True
+
+
+def ingest_notification_months(
+    monthly_data: Dict[int, Dict[BlockKey, int]],
+    fingerprints: Dict[int, Fingerprint],
+    removed_months: Iterable[int] = (),
+) -> None:
+    global _cube
+
+    with _refresh_lock:
+        cube = _cube if _cube is not None else build_cube({})
+        # Requests hold on to the cube they started with, so swapping the
+        # reference is enough to never expose a half-built state
+        _cube = build_cube(
+            monthly_data, fingerprints, base=cube, removed_months=removed_months
+        )
+
+    removed = f", removed {sorted(removed_months)}" if removed_months else ""
+    logger.info(
+        f"Ingested notification months {sorted(monthly_data)}{removed}, now "
+        f"serving {len(_cube.months)} months with "
+        f"{len(_cube.levels[Granularity.TRACT].codes)} censitary codes"
+    )
+
+
+def publish_month_file(
+    month: int, binary_file: BinaryIO, csv_dir: Path = BASE_CSV_DIR
+) -> Dict[BlockKey, int]:
+    # The upload is validated and aggregated row by row while it is copied to
+    # a hidden file of its own, which only replaces the month file once it is
+    # complete
+    file_path = csv_dir / f"{month}.csv"
+    month_data: Dict[BlockKey, int] = {}
+
+    output = tempfile.NamedTemporaryFile(
+        "w",
+        encoding="utf-8",
+        newline="",
+        dir=csv_dir,
+        prefix=f".{month}.",
+        suffix=".uploading",
+        delete=False,
+    )
+    uploading_path = Path(output.name)
+
+    try:
+        with output:
+            writer = csv.writer(output, lineterminator="\n")
+            writer.writerow(CSV_HEADER)
+            reader = csv.reader(codecs.iterdecode(binary_file, "utf-8-sig"))
+            for row in validate_month_rows(month, reader):
+                writer.writerow(row)
+                key = (row[2], row[3])
+                month_data[key] = month_data.get(key, 0) + int(row[1])
+
+        # Temporary files are private, month files are read by the build step
+        os.chmod(uploading_path, 0o644)
+
+        # Concurrent uploads of a month are published one at a time, so the
+        # file left in place is always the one ingested last
+        with _refresh_lock:
+            os.replace(uploading_path, file_path)
+            ingest_notification_months(
+                {month: month_data}, {month: file_fingerprint(file_path)}
+            )
+    finally:
+        uploading_path.unlink(missing_ok=True)
+
+    return month_data
+
+
+async def watch_notification_files(
+    interval: float, csv_dir: Path = BASE_CSV_DIR
+) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(refresh_notification_cube, csv_dir)
+        except Exception as e:
+            logger.error(f"Error refreshing notification data: {str(e)}")
+
+
+def get_notification_cube() -> NotificationCube:
+    if _cube is None:
+        init_notification_cube()
+    return _cube
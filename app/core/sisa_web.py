@@ -0,0 +1,266 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Dict, List
+
+import httpx
+from fastapi import HTTPException, status
+
+import app.core.config as cfg
+from app.core.sisa_web_store import Bucket, is_final, load_bucket, save_bucket
+from app.logger import logger  # noqa: F401
+
+_client: httpx.AsyncClient | None = None
+_upstream_slots: asyncio.Semaphore | None = None
+
+
+class CachedBucket:
+    def __init__(self, values: Dict[str, int], expires_at: float | None):
+        self.values = values
+        self.expires_at = expires_at
+
+    def is_fresh(self) -> bool:
+        return self.expires_at is None or time.monotonic() < self.expires_at
+
+
+class CircuitBreaker:
+    """Fails fast once upstream keeps failing.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are refused for `recovery_seconds`. Then a single trial call is let
+    through per period, and the first success closes the circuit again.
+    """
+
+    def __init__(self, failure_threshold: int, recovery_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    def is_open(self) -> bool:
+        return (
+            self.opened_at is not None
+            and time.monotonic() - self.opened_at < self.recovery_seconds
+        )
+
+    def allow_request(self) -> bool:
+        if self.opened_at is None:
+            return True
+
+        if self.is_open():
+            return False
+
+        self.opened_at = time.monotonic()
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning("SISA Web API keeps failing, opening circuit breaker")
+            self.opened_at = time.monotonic()
+
+
+_circuit_breaker = CircuitBreaker(
+    failure_threshold=cfg.SISA_WEB_FAILURE_THRESHOLD,
+    recovery_seconds=cfg.SISA_WEB_RECOVERY_SECONDS,
+)
+
+# Completed months never change upstream, so their buckets never expire.
+# Buckets of the current month expire, and are then served stale while they
+# are refreshed in the background. Only the most recently used buckets are
+# kept, evicted completed months are read back from the SQLite store
+_bucket_cache: "OrderedDict[Bucket, CachedBucket]" = OrderedDict()
+
+# Upstream fetches in flight, shared by every request that needs the same bucket
+_pending_buckets: Dict[Bucket, asyncio.Future] = {}
+
+
+def init_sisa_web_client() -> None:
+    global _client, _upstream_slots
+
+    # max_connections bounds how many requests are in flight upstream at once,
+    # the pool timeout bounds how long a request waits for one of them
+    _client = httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            cfg.SISA_WEB_TIMEOUT_SECONDS, pool=cfg.SISA_WEB_POOL_TIMEOUT_SECONDS
+        ),
+        limits=httpx.Limits(
+            max_connections=cfg.SISA_WEB_MAX_CONNECTIONS,
+            max_keepalive_connections=cfg.SISA_WEB_MAX_CONNECTIONS,
+            keepalive_expiry=60,
+        ),
+    )
+    # Requests queue here for a free connection instead of in the pool, whose
+    # timeout would fail the last buckets of a long range
+    _upstream_slots = asyncio.Semaphore(cfg.SISA_WEB_MAX_CONNECTIONS)
+
+
+async def close_sisa_web_client() -> None:
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_sisa_web_client() -> httpx.AsyncClient:
+    if _client is None:
+        init_sisa_web_client()
+    return _client
+
+
+async def fetch_sisa_web_data(start_date: date, end_date: date) -> List[Dict]:
+    params = {
+        "tipo": 4,
+        "id": 471,
+        "exec": 2,
+        "censitario": 1,
+        "inicio": start_date.strftime("%Y-%m-%d"),
+        "final": end_date.strftime("%Y-%m-%d"),
+    }
+
+    if not _circuit_breaker.allow_request():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="SISA Web API is unavailable, try again later",
+        )
+
+    client = get_sisa_web_client()
+    try:
+        async with _upstream_slots:
+            response = await client.get(cfg.SISA_WEB_API_URL, params=params)
+    except httpx.PoolTimeout:
+        # Waiting for a local connection says nothing about upstream health,
+        # so it doesn't count towards opening the circuit
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many requests to the SISA Web API, try again later",
+        )
+    except httpx.TimeoutException:
+        _circuit_breaker.record_failure()
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Timed out fetching data from SISA Web API",
+        )
+    except httpx.HTTPError as e:
+        _circuit_breaker.record_failure()
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Error fetching data from SISA Web API: {str(e)}",
+        )
+
+    if response.status_code != 200:
+        _circuit_breaker.record_failure()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error fetching data from SISA Web API: {response.text}",
+        )
+
+    _circuit_breaker.record_success()
+
+    return response.json()
+
+
+def month_buckets(start_date: date, end_date: date) -> List[Bucket]:
+    buckets: List[Bucket] = []
+
+    bucket_start = start_date
+    while bucket_start <= end_date:
+        next_month = (bucket_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        bucket_end = min(next_month - timedelta(days=1), end_date)
+        buckets.append((bucket_start, bucket_end))
+        bucket_start = next_month
+
+    return buckets
+
+
+async def get_bucket_values(bucket: Bucket) -> Dict[str, int]:
+    cached = _bucket_cache.get(bucket)
+    if cached is not None:
+        _bucket_cache.move_to_end(bucket)
+        # While the circuit is open the refresh would only be refused, so the
+        # stale values are served without trying
+        if not cached.is_fresh() and not _circuit_breaker.is_open():
+            refresh_bucket(bucket)
+        return cached.values
+
+    # shield keeps a cancelled caller (e.g. a client disconnect) from
+    # cancelling the fetch the other callers are waiting on
+    return await asyncio.shield(refresh_bucket(bucket))
+
+
+def refresh_bucket(bucket: Bucket) -> asyncio.Future:
+    pending = _pending_buckets.get(bucket)
+    if pending is None:
+        pending = asyncio.ensure_future(fetch_bucket_values(bucket))
+        _pending_buckets[bucket] = pending
+        pending.add_done_callback(lambda future: finish_refresh(bucket, future))
+    return pending
+
+
+def finish_refresh(bucket: Bucket, future: asyncio.Future) -> None:
+    _pending_buckets.pop(bucket, None)
+
+    # A bucket that is already cached was refreshed in the background, so
+    # nobody awaited the fetch and its failure is only logged here. Cold
+    # fetches raise to their callers instead
+    if (
+        not future.cancelled()
+        and future.exception() is not None
+        and bucket in _bucket_cache
+    ):
+        logger.warning(
+            f"Error refreshing SISA Web data for {bucket[0]} to {bucket[1]}: "
+            f"{str(future.exception())}"
+        )
+
+
+async def fetch_bucket_values(bucket: Bucket) -> Dict[str, int]:
+    historical = is_final(bucket)
+
+    values = await asyncio.to_thread(load_bucket, bucket) if historical else None
+
+    if values is None:
+        data = await fetch_sisa_web_data(*bucket)
+
+        values = {}
+        for data_piece in data:
+            censitary_code = data_piece["censitario"]
+            values[censitary_code] = values.get(censitary_code, 0) + int(
+                data_piece["trabalhados"]
+            )
+
+        if historical:
+            await asyncio.to_thread(save_bucket, bucket, values)
+
+    expires_at = (
+        None
+        if historical
+        else time.monotonic() + cfg.SISA_WEB_CURRENT_MONTH_TTL_SECONDS
+    )
+    _bucket_cache[bucket] = CachedBucket(values=values, expires_at=expires_at)
+    _bucket_cache.move_to_end(bucket)
+    while len(_bucket_cache) > cfg.SISA_WEB_BUCKET_CACHE_SIZE:
+        _bucket_cache.popitem(last=False)
+
+    return values
+
+
+async def get_sisa_web_properties(start_date: date, end_date: date) -> Dict[str, int]:
+    buckets = month_buckets(start_date, end_date)
+    bucket_values = await asyncio.gather(
+        *(get_bucket_values(bucket) for bucket in buckets)
+    )
+
+    properties: Dict[str, int] = {}
+    for values in bucket_values:
+        for censitary_code, value in values.items():
+            properties[censitary_code] = properties.get(censitary_code, 0) + value
+
+    return properties
@@ -0,0 +1,110 @@
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import date
+from pathlib import Path
+from typing import Dict, Set, Tuple
+
+import app.core.config as cfg
+from app.logger import logger  # noqa: F401
+
+Bucket = Tuple[date, date]
+
+# Only buckets of completed months are stored, since the SISA Web data of the
+# current month can still change. `sisa_web_buckets` records which buckets
+# were fetched, so buckets without any property are not fetched again
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sisa_web_buckets (
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    fetched_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (start_date, end_date)
+);
+CREATE TABLE IF NOT EXISTS sisa_web_properties (
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    censitario TEXT NOT NULL,
+    trabalhados INTEGER NOT NULL,
+    PRIMARY KEY (start_date, end_date, censitario)
+);
+"""
+
+
+def is_final(bucket: Bucket) -> bool:
+    return bucket[1] < date.today().replace(day=1)
+
+
+# The schema is created once per store, and every thread keeps its own
+# connection, since sqlite3 connections can't be shared between threads
+_initialized_stores: Set[Path] = set()
+_init_lock = threading.Lock()
+_local = threading.local()
+
+
+def init_store(path: Path) -> None:
+    with _init_lock:
+        if path in _initialized_stores:
+            return
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(path, timeout=30)) as connection:
+            # WAL lets every uvicorn worker read while another one writes
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+        _initialized_stores.add(path)
+
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    path = Path(path or cfg.SISA_WEB_STORE_PATH)
+    connections: Dict[Path, sqlite3.Connection] = _local.__dict__.setdefault(
+        "connections", {}
+    )
+
+    if path not in connections:
+        init_store(path)
+        connections[path] = sqlite3.connect(path, timeout=30)
+    return connections[path]
+
+
+def load_bucket(bucket: Bucket, path: Path | None = None) -> Dict[str, int] | None:
+    start_date, end_date = (day.isoformat() for day in bucket)
+
+    connection = connect(path)
+    fetched = connection.execute(
+        "SELECT 1 FROM sisa_web_buckets WHERE start_date = ? AND end_date = ?",
+        (start_date, end_date),
+    ).fetchone()
+    if fetched is None:
+        return None
+
+    rows = connection.execute(
+        "SELECT censitario, trabalhados FROM sisa_web_properties "
+        "WHERE start_date = ? AND end_date = ?",
+        (start_date, end_date),
+    ).fetchall()
+
+    return dict(rows)
+
+
+def save_bucket(
+    bucket: Bucket, values: Dict[str, int], path: Path | None = None
+) -> None:
+    if not is_final(bucket):
+        return
+
+    start_date, end_date = (day.isoformat() for day in bucket)
+
+    with connect(path) as connection:
+        connection.executemany(
+            "INSERT OR REPLACE INTO sisa_web_properties "
+            "(start_date, end_date, censitario, trabalhados) VALUES (?, ?, ?, ?)",
+            [
+                (start_date, end_date, censitary_code, value)
+                for censitary_code, value in values.items()
+            ],
+        )
+        connection.execute(
+            "INSERT OR REPLACE INTO sisa_web_buckets (start_date, end_date) "
+            "VALUES (?, ?)",
+            (start_date, end_date),
+        )
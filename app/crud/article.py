@@ -1,61 +1,107 @@
 import re
+from typing import List, Sequence, Tuple
 
-from sqlalchemy import or_
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Numeric, cast, func, or_
+from sqlalchemy.orm import Query, Session, joinedload, load_only
 
+from app.crud.pagination import paginate, paginate_by_cursor
 from app.logger import logger  # noqa: F401
 from app.models import Article, SectionName, User
 from app.schemas.article import ArticlePublic
 
+# List queries only load what ArticlePublic shows, the HTML content is only
+# loaded by get_article_by_id
+ARTICLE_LIST_OPTIONS = (
+    load_only(
+        Article.title,
+        Article.preview,
+        Article.section,
+        Article.created_at,
+        Article.updated_at,
+    ),
+    joinedload(Article.user).load_only(User.full_name),
+)
+
 
 def get_articles_by_title(db: Session, title: str | None) -> ArticlePublic:
     if title is None:
-        articles = db.query(Article).all()
+        articles = db.query(Article).options(*ARTICLE_LIST_OPTIONS).all()
     else:
-        articles = db.query(Article).filter(Article.title.ilike(f"%{title}%")).all()
+        # `%` also matches titles with typos, the closest ones come first
+        articles = (
+            db.query(Article)
+            .options(*ARTICLE_LIST_OPTIONS)
+            .filter(
+                or_(Article.title.ilike(f"%{title}%"), Article.title.op("%")(title))
+            )
+            .order_by(func.similarity(Article.title, title).desc())
+            .all()
+        )
 
     return articles
 
 
+def paginate_articles(
+    query: Query,
+    keys: Sequence,
+    skip: int,
+    limit: int,
+    cursor: str | None,
+) -> Tuple[List[ArticlePublic], int | None, str | None]:
+    query = query.order_by(*(key.desc() for key in keys))
+
+    if cursor is None:
+        articles, total, next_cursor = paginate(query, skip, limit, keys)
+    else:
+        # Counting every match would cost as much as the deep OFFSET it
+        # replaces, so cursor pages have no total
+        articles, next_cursor = paginate_by_cursor(query, keys, cursor, limit)
+        total = None
+
+    return (
+        [
+            ArticlePublic(
+                id=article.id,
+                title=article.title,
+                preview=article.preview,
+                section=article.section,
+                updated_at=article.updated_at,
+                created_at=article.created_at,
+                author_name=article.user.full_name if article.user else None,
+            )
+            for article in articles
+        ],
+        total,
+        next_cursor,
+    )
+
+
 def get_articles_by_content(
     db: Session,
     content: str,
     section: SectionName | None = None,
     skip: int = 0,
     limit: int = 10000,
-) -> ArticlePublic:
+    cursor: str | None = None,
+) -> Tuple[List[ArticlePublic], int | None, str | None]:
+    search_query = func.websearch_to_tsquery("portuguese", content)
+
     query = (
         db.query(Article)
-        .options(joinedload(Article.user))
-        .filter(
-            or_(
-                Article.content.ilike(f"%{content}%"),
-                Article.title.ilike(f"%{content}%"),
-            )
-        )
-        .order_by(Article.updated_at.desc())
+        .options(*ARTICLE_LIST_OPTIONS)
+        .filter(Article.search_vector.op("@@")(search_query))
     )
+    # The rank is compared as numeric, so it round-trips exactly through a cursor
+    keys = [
+        cast(func.ts_rank(Article.search_vector, search_query), Numeric),
+        Article.updated_at,
+        Article.id,
+    ]
 
     if section is not None:
         query = query.filter(Article.section == section.name)
 
-    query = query.offset(skip).limit(limit)
-
-    articles = query.all()
-
-    return [
-        ArticlePublic(
-            id=article.id,
-            title=article.title,
-            content=article.content,
-            preview=article.preview,
-            section=article.section,
-            updated_at=article.updated_at,
-            created_at=article.created_at,
-            author_name=article.user.full_name if article.user else None,
-        )
-        for article in articles
-    ]
+    return paginate_articles(query, keys, skip, limit, cursor)
 
 
 def get_articles_by_author_name_search(
@@ -64,39 +110,30 @@ def get_articles_by_author_name_search(
     section: SectionName | None = None,
     skip: int = 0,
     limit: int = 10000,
-) -> ArticlePublic:
+    cursor: str | None = None,
+) -> Tuple[List[ArticlePublic], int | None, str | None]:
     query = (
         db.query(Article)
         .join(User)
-        .options(joinedload(Article.user))
-        .filter(User.full_name.ilike(f"%{author}%"))
-        .order_by(Article.updated_at.desc())
+        .options(*ARTICLE_LIST_OPTIONS)
+        .filter(
+            or_(User.full_name.ilike(f"%{author}%"), User.full_name.op("%")(author))
+        )
     )
+    keys = [Article.updated_at, Article.id]
 
     if section is not None:
         query = query.filter(Article.section == section.name)
 
-    query = query.offset(skip).limit(limit)
-
-    articles = query.all()
-
-    return [
-        ArticlePublic(
-            id=article.id,
-            title=article.title,
-            content=article.content,
-            preview=article.preview,
-            section=article.section,
-            updated_at=article.updated_at,
-            created_at=article.created_at,
-            author_name=article.user.full_name if article.user else None,
-        )
-        for article in articles
-    ]
+    return paginate_articles(query, keys, skip, limit, cursor)
 
 
 def get_articles_by_author_id(db: Session, user_id: str) -> ArticlePublic:
-    query = db.query(Article).filter(Article.author_id == user_id)
+    query = (
+        db.query(Article)
+        .options(*ARTICLE_LIST_OPTIONS)
+        .filter(Article.author_id == user_id)
+    )
 
     articles = query.all()
 
@@ -104,7 +141,6 @@ def get_articles_by_author_id(db: Session, user_id: str) -> ArticlePublic:
         ArticlePublic(
             id=article.id,
             title=article.title,
-            content=article.content,
             preview=article.preview,
             section=article.section,
             updated_at=article.updated_at,
@@ -116,34 +152,19 @@ def get_articles_by_author_id(db: Session, user_id: str) -> ArticlePublic:
 
 
 def get_articles_by_section(
-    db: Session, section: SectionName | None, skip: int = 0, limit: int = 10000
-) -> ArticlePublic:
-    query = (
-        db.query(Article)
-        .options(joinedload(Article.user))
-        .order_by(Article.updated_at.desc())
-    )
+    db: Session,
+    section: SectionName | None,
+    skip: int = 0,
+    limit: int = 10000,
+    cursor: str | None = None,
+) -> Tuple[List[ArticlePublic], int | None, str | None]:
+    query = db.query(Article).options(*ARTICLE_LIST_OPTIONS)
+    keys = [Article.updated_at, Article.id]
 
     if section is not None:
         query = query.filter(Article.section == section.name)
 
-    query = query.offset(skip).limit(limit)
-
-    articles = query.all()
-
-    return [
-        ArticlePublic(
-            id=article.id,
-            title=article.title,
-            content=article.content,
-            preview=article.preview,
-            section=article.section,
-            updated_at=article.updated_at,
-            created_at=article.created_at,
-            author_name=article.user.full_name if article.user else None,
-        )
-        for article in articles
-    ]
+    return paginate_articles(query, keys, skip, limit, cursor)
 
 
 def get_article_by_id(db: Session, id: str, full_content: bool) -> Article:
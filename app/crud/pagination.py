@@ -0,0 +1,76 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from decimal import InvalidOperation
+from typing import Any, List, Sequence, Tuple
+
+from sqlalchemy import func, literal, tuple_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps(
+        [
+            value.isoformat() if isinstance(value, datetime) else str(value)
+            for value in values
+        ]
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str, keys: Sequence) -> List[Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(payload, list) or len(payload) != len(keys):
+            raise ValueError
+
+        values = []
+        for key, value in zip(keys, payload):
+            python_type = key.type.python_type
+            if python_type is datetime:
+                values.append(datetime.fromisoformat(value))
+            else:
+                values.append(python_type(value))
+    except (ValueError, TypeError, binascii.Error, InvalidOperation):
+        raise ValueError("Invalid cursor")
+
+    return values
+
+
+def paginate(
+    query: Query, skip: int | None, limit: int | None, keys: Sequence = ()
+) -> Tuple[List, int, str | None]:
+    # count(*) over () is computed before OFFSET/LIMIT, so every page row also
+    # carries the total number of matches and only the page is fetched
+    rows = query.add_columns(func.count().over(), *keys).offset(skip).limit(limit).all()
+
+    if not rows:
+        # A page past the last match has no row to carry the total
+        total = query.order_by(None).count() if skip else 0
+        return [], total, None
+
+    total = rows[0][1]
+    has_more = (skip or 0) + len(rows) < total
+    next_cursor = encode_cursor(rows[-1][2:]) if keys and has_more else None
+
+    return [row[0] for row in rows], total, next_cursor
+
+
+def paginate_by_cursor(
+    query: Query, keys: Sequence, cursor: str, limit: int | None
+) -> Tuple[List, str | None]:
+    # `query` must be ordered by `keys`, all descending, so the page after the
+    # cursor is a single range scan over an index on them, however deep it is
+    values = decode_cursor(cursor, keys)
+    query = query.filter(
+        tuple_(*keys)
+        < tuple_(*(literal(value, key.type) for key, value in zip(keys, values)))
+    )
+
+    rows = query.add_columns(*keys).limit(None if limit is None else limit + 1).all()
+
+    if limit is None or len(rows) <= limit:
+        return [row[0] for row in rows], None
+
+    return [row[0] for row in rows[:limit]], encode_cursor(rows[limit - 1][1:])
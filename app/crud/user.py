@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List
+from sqlalchemy import func, or_
+from typing import List, Tuple
 
+from app.crud.pagination import paginate
 from app.models import User, UserRole
 from app.logger import logger  # noqa: F401
 
@@ -35,19 +36,25 @@ def list_users(
     limit: int = 100,
     role: UserRole | None = None,
     search: str | None = None,
-) -> List[User]:
+) -> Tuple[List[User], int]:
     query = db.query(User)
 
     if role is not None:
         query = query.filter(User.role == role)
 
     if search is not None:
+        # Plain column comparisons, so the trigram indexes on full_name and
+        # email can serve them. `%` also matches names with typos
         query = query.filter(
-            or_(User.full_name.ilike(f"%{search}%"), User.email.ilike(f"%{search}%"))
-        )
+            or_(
+                User.full_name.ilike(f"%{search}%"),
+                User.full_name.op("%")(search),
+                User.email.ilike(f"%{search}%"),
+            )
+        ).order_by(func.similarity(User.full_name, search).desc())
 
-    query = query.order_by(User.full_name.asc()).offset(skip).limit(limit)
+    query = query.order_by(User.full_name.asc())
 
-    users = query.all()
+    users, total, _ = paginate(query, skip, limit)
 
-    return users
+    return users, total
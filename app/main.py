@@ -1,3 +1,6 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -9,6 +12,8 @@ import app.api.data as data_api
 import cloudinary
 import cloudinary.uploader
 import app.core.config as cfg
+from app.core.notifications import init_notification_cube, watch_notification_files
+from app.core.sisa_web import close_sisa_web_client, init_sisa_web_client
 
 cloudinary.config(
     cloud_name=cfg.CLOUDINARY_CLOUD_NAME,
@@ -41,7 +46,20 @@ origins = [
     "http://localhost:3000",
 ]
 
-app = FastAPI(debug=True, openapi_tags=tags_metadata)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_notification_cube()
+    init_sisa_web_client()
+    notification_watcher = asyncio.create_task(
+        watch_notification_files(cfg.NOTIFICATION_REFRESH_SECONDS)
+    )
+    yield
+    notification_watcher.cancel()
+    await close_sisa_web_client()
+
+
+app = FastAPI(debug=True, openapi_tags=tags_metadata, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
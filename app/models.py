@@ -4,6 +4,7 @@ import sqlalchemy.orm as orm
 from uuid import uuid4
 from enum import Enum as PyEnum
 
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -38,6 +39,22 @@ class User(Base):
     bio = sa.Column(sa.String, nullable=False)
     profile_picture = sa.Column(sa.String, nullable=True)
 
+    # Trigram indexes serve the `ilike '%term%'` and similarity searches
+    __table_args__ = (
+        sa.Index(
+            "ix_users_full_name_trgm",
+            full_name,
+            postgresql_using="gin",
+            postgresql_ops={"full_name": "gin_trgm_ops"},
+        ),
+        sa.Index(
+            "ix_users_email_trgm",
+            email,
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops"},
+        ),
+    )
+
 
 class Section(Base):
     __tablename__ = "sections"
@@ -65,6 +82,33 @@ class Article(Base):
     author_id = sa.Column(sa.ForeignKey("users.id"), nullable=False)
     user = orm.relationship("User", foreign_keys=[author_id])
 
+    # Kept up to date by Postgres, title words rank above content words
+    search_vector = orm.deferred(
+        sa.Column(
+            TSVECTOR,
+            sa.Computed(
+                "setweight(to_tsvector('portuguese', title), 'A') || "
+                "setweight(to_tsvector('portuguese', "
+                "regexp_replace(content, '<[^>]*>', ' ', 'g')), 'B')",
+                persisted=True,
+            ),
+        )
+    )
+
+    __table_args__ = (
+        sa.Index("ix_articles_search_vector", "search_vector", postgresql_using="gin"),
+        sa.Index(
+            "ix_articles_title_trgm",
+            title,
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        # Serve the (updated_at, id) keyset pages of each section and of the
+        # listing without a section
+        sa.Index("ix_articles_section_updated_at_id", section, updated_at, id),
+        sa.Index("ix_articles_updated_at_id", updated_at, id),
+    )
+
 
 class Version(Base):
     __tablename__ = "versions"
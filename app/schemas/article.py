@@ -18,7 +18,8 @@ class ArticlePublic(BaseModel):
 
 class ArticleSearchResponse(BaseModel):
     articles: list[ArticlePublic]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class ArticleSearch(PyEnum):
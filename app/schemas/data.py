@@ -1,6 +1,69 @@
+from enum import Enum as PyEnum
+
 from pydantic import BaseModel
 
 
+class Granularity(PyEnum):
+    BLOCK = "block"
+    TRACT = "tract"
+    SUBDISTRICT = "subdistrict"
+    DISTRICT = "district"
+    MUNICIPALITY = "municipality"
+
+
+class HotspotMetric(PyEnum):
+    COUNT = "count"
+    # Against the same window of at least two prior years. Codes whose prior
+    # years are all equal have no z-score and are left out
+    ZSCORE = "zscore"
+
+
+class OutputFormat(PyEnum):
+    JSON = "json"
+    NDJSON = "ndjson"
+
+
 class CensitaryValue(BaseModel):
     censitary_code: str
     value: int
+    block: str | None = None
+
+
+class CensitarySeries(BaseModel):
+    censitary_code: str
+    values: list[int]
+    block: str | None = None
+
+
+class NotificationSeries(BaseModel):
+    months: list[str]
+    series: list[CensitarySeries]
+
+
+class CombinedData(BaseModel):
+    censitary_codes: list[str]
+    notifications: list[int]
+    properties: list[int]
+
+
+class Hotspot(BaseModel):
+    censitary_code: str
+    value: int
+    score: float
+    block: str | None = None
+
+
+class ControlChannelValue(BaseModel):
+    censitary_code: str
+    value: int
+    first_quartile: float
+    median: float
+    third_quartile: float
+    above: bool
+    block: str | None = None
+
+
+class MonthUpload(BaseModel):
+    month: str
+    censitary_codes: int
+    notifications: int
@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+from datetime import date, timedelta
+
+import app.core.config as cfg
+from app.core.sisa_web import (
+    close_sisa_web_client,
+    get_bucket_values,
+    init_sisa_web_client,
+    month_buckets,
+)
+
+
+async def backfill(start_date: date, end_date: date) -> int:
+    buckets = month_buckets(start_date, end_date)
+    censitary_codes = set()
+
+    # Fetch one batch of months per free connection at a time, so progress is
+    # reported as the range is stored
+    init_sisa_web_client()
+    try:
+        for batch_start in range(0, len(buckets), cfg.SISA_WEB_MAX_CONNECTIONS):
+            batch = buckets[batch_start : batch_start + cfg.SISA_WEB_MAX_CONNECTIONS]
+            for values in await asyncio.gather(
+                *(get_bucket_values(bucket) for bucket in batch)
+            ):
+                censitary_codes.update(values)
+            print(f"Stored SISA Web data up to {batch[-1][1]}")
+    finally:
+        await close_sisa_web_client()
+
+    return len(censitary_codes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Stores the SISA Web data of a past date range in the local SQLite store, so a cold deploy does not fetch it again"
+    )
+    parser.add_argument("--start-date", type=date.fromisoformat, required=True)
+    last_completed_day = date.today().replace(day=1) - timedelta(days=1)
+    parser.add_argument(
+        "--end-date",
+        type=date.fromisoformat,
+        default=last_completed_day,
+        help="Defaults to the end of last month. Only completed months are stored",
+    )
+    args = parser.parse_args()
+
+    end_date = min(args.end_date, last_completed_day)
+    if args.start_date > end_date:
+        parser.error(
+            "The start date must be before the end date and before the current month."
+        )
+
+    censitary_codes = asyncio.run(backfill(args.start_date, end_date))
+
+    print(
+        f"Stored SISA Web data from {args.start_date} to {end_date} "
+        f"for {censitary_codes} censitary codes"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Tuple
+
+from app.core.notifications import (
+    ARCHIVE_DIR,
+    BASE_CSV_DIR,
+    BlockKey,
+    Fingerprint,
+    build_cube,
+    file_fingerprint,
+    list_month_files,
+    load_notification_archive,
+    missing_months,
+    read_validated_month_file,
+    save_notification_archive,
+)
+from app.schemas.data import Granularity
+
+
+def parse_month_file(
+    file_path: Path,
+) -> Tuple[Fingerprint | None, Dict[BlockKey, int]]:
+    # Only files of the directory the API watches get a fingerprint, the API
+    # drops those months if their file is deleted and keeps the others
+    watched = file_path.parent.resolve() == BASE_CSV_DIR.resolve()
+    fingerprint = file_fingerprint(file_path) if watched else None
+    return fingerprint, read_validated_month_file(file_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Validates monthly notification CSVs in parallel and writes the binary archive memory-mapped by the API"
+    )
+    parser.add_argument(
+        "csv_dirs",
+        nargs="*",
+        type=Path,
+        default=[BASE_CSV_DIR],
+        help="Directories with YYYYMM.csv files. When a month is in more than one, the last directory wins",
+    )
+    parser.add_argument("--archive-dir", type=Path, default=ARCHIVE_DIR)
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="Add the months to the existing archive instead of replacing it",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    file_paths: Dict[int, Path] = {}
+    for csv_dir in args.csv_dirs:
+        file_paths.update(list_month_files(csv_dir))
+
+    monthly_data = {}
+    fingerprints = {}
+    errors = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(parse_month_file, file_path): month
+            for month, file_path in file_paths.items()
+        }
+        for future in as_completed(futures):
+            month = futures[future]
+            try:
+                fingerprint, monthly_data[month] = future.result()
+            except ValueError as e:
+                errors.append(str(e))
+                continue
+            if fingerprint is not None:
+                fingerprints[month] = fingerprint
+
+    if errors:
+        sys.exit("Invalid notification files:\n" + "\n".join(sorted(errors)))
+
+    base = None
+    removed_months = []
+    if args.merge and args.archive_dir.exists():
+        base = load_notification_archive(args.archive_dir)
+        removed_months = missing_months(base, list_month_files(BASE_CSV_DIR))
+
+    cube = build_cube(
+        monthly_data, fingerprints, base=base, removed_months=removed_months
+    )
+    save_notification_archive(cube, args.archive_dir)
+
+    print(
+        f"Wrote {len(cube.months)} months and "
+        f"{len(cube.levels[Granularity.BLOCK].codes)} blocks to {args.archive_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import json
+import random
+from datetime import date
+from pathlib import Path
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+
+SISA_WEB_API_URL = "https://vigent.saude.sp.gov.br/sisaweb_api/dados.php"
+RECORDINGS_DIR = Path("data/sisa_web_recordings")
+
+# Municipality and district prefix used for the synthetic censitary codes
+SYNTHETIC_CODE_PREFIX = "354980505"
+
+
+def recording_path(recordings_dir: Path, request: Request) -> Path:
+    # Only real dates make it into the file name, so a query can't point
+    # outside the recordings directory
+    params = request.query_params
+    try:
+        start_date = date.fromisoformat(params.get("inicio"))
+        end_date = date.fromisoformat(params.get("final"))
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=400, detail="inicio and final must be YYYY-MM-DD dates"
+        )
+
+    return recordings_dir / f"{start_date.isoformat()}_{end_date.isoformat()}.json"
+
+
+def synthetic_payload(request: Request, codes: int, seed: int) -> list[dict]:
+    # Seeded by the query, so the same range always gets the same payload
+    params = request.query_params
+    rng = random.Random(f"{seed}:{params.get('inicio')}:{params.get('final')}")
+    return [
+        {
+            "censitario": f"{SYNTHETIC_CODE_PREFIX}{index:06d}",
+            "trabalhados": rng.randint(0, 500),
+        }
+        for index in range(codes)
+    ]
+
+
+def create_app(args: argparse.Namespace) -> FastAPI:
+    app = FastAPI(title="SISA Web stand-in")
+    rng = random.Random(args.seed)
+
+    @app.get("/sisaweb_api/dados.php")
+    async def dados(request: Request):
+        latency = max(0.0, rng.gauss(args.latency_ms, args.jitter_ms)) / 1000
+        await asyncio.sleep(latency)
+
+        if rng.random() < args.error_rate:
+            raise HTTPException(status_code=500, detail="Synthetic upstream error")
+
+        if args.mode == "synthetic":
+            return synthetic_payload(request, args.codes, args.seed)
+
+        file_path = recording_path(args.recordings_dir, request)
+
+        if args.mode == "replay":
+            if not file_path.exists():
+                raise HTTPException(
+                    status_code=404, detail=f"No recording at {file_path}"
+                )
+            return json.loads(file_path.read_text(encoding="utf-8"))
+
+        async with httpx.AsyncClient(timeout=args.upstream_timeout) as client:
+            response = await client.get(
+                args.upstream_url, params=dict(request.query_params)
+            )
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
+
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(response.text, encoding="utf-8")
+        return response.json()
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Local stand-in for the SISA Web API, to benchmark the data endpoints offline"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["record", "replay", "synthetic"],
+        default="replay",
+        help="record proxies the real API and saves its answers, replay serves the saved answers, synthetic generates payloads",
+    )
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--recordings-dir", type=Path, default=RECORDINGS_DIR)
+    parser.add_argument("--upstream-url", default=SISA_WEB_API_URL)
+    parser.add_argument("--upstream-timeout", type=float, default=60)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0,
+        help="Share of requests answered with 500",
+    )
+    parser.add_argument(
+        "--codes",
+        type=int,
+        default=1000,
+        help="Censitary codes per synthetic payload",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args), port=args.port)
+
+
+if __name__ == "__main__":
+    main()